@@ -1,19 +1,22 @@
 #!/usr/bin/env python3
-"""Unified CLI for Chroma collections: Display, Retrieve, and RAG."""
+"""Unified CLI for Chroma collections: Display, Retrieve, and RAG.
+
+Embedding/LLM stacks (torch, transformers, langchain_groq) are imported only
+once a mode that needs them is chosen, so listing collections starts fast.
+"""
 from __future__ import annotations
 
 import sys
 from pathlib import Path
 
 from src.config import PERSIST_DIR, MODEL_NAME, TOP_K, GROQ_API_KEY
-from src.core.vectorstore import get_db
 from src.core.utils import (
     perform_retrieve,
     _display_collection_info,
-    display_results,
+    format_results,
     list_collections_with_stats,
+    normalize_query,
 )
-from src.core.rag_service import setup_rag_chain
 
 
 def _print_block(text: str) -> None:
@@ -82,34 +85,39 @@ def main() -> None:
         collection_name, pdf_name = select_collection(persist_dir)
         if not collection_name:
             continue
+        from src.core.vectorstore import get_db
+
         db = get_db(collection_name)
 
         if mode == '2':
             display_collection_info(db, collection_name, persist_dir, MODEL_NAME, pdf_name)
         elif mode == '3':
             query = " ".join(sys.argv[1:]) if len(sys.argv) > 1 else input("Enter your query: ")
-            if not query:
+            if not normalize_query(query):
                 print("No query provided. Continuing.")
                 continue
             results = perform_retrieve(db, query, TOP_K)
-            display_results(results, _print_block, print)
+            sys.stdout.write(format_results(results))
+            sys.stdout.flush()
         else:  # mode == '4' -> RAG
             if not GROQ_API_KEY:
                 print("GROQ_API_KEY not set. Please set it in your environment to use RAG.")
                 continue
-            chain = setup_rag_chain(db, top_k=TOP_K)
+            from src.core.rag_service import setup_rag_chain_stream, stream_answer
+
+            # Also opens the Groq connection in the background while the user types the question
+            retriever, llm, prompt = setup_rag_chain_stream(db, top_k=TOP_K)
             question = input("Enter your RAG question: ").strip()
-            if not question:
+            if not normalize_query(question):
                 print("No question provided. Continuing.")
                 continue
             try:
-                answer = chain.invoke({"query": question})
-                if isinstance(answer, dict) and "result" in answer:
-                    print(f"\nAnswer:\n{answer['result']}")
-                else:
-                    print(f"\nAnswer:\n{answer}")
+                print("\nAnswer:")
+                for chunk in stream_answer(retriever, llm, prompt, question):
+                    print(chunk, end="", flush=True)
+                print()
             except Exception as e:
-                print(f"Error running RAG chain: {e}")
+                print(f"\nError running RAG chain: {e}")
 
         cont = input("\nDo you want to perform another action? (y/n): ").strip().lower()
         if cont != 'y':
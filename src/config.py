@@ -12,18 +12,40 @@ load_dotenv()
 
 # Disable tokenizers parallelism to avoid warnings
 os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+# Persist Numba-compiled kernels across runs (see src/core/rerank.py)
+os.environ.setdefault("NUMBA_CACHE_DIR", str(Path.home() / ".cache" / "contracts-rag" / "numba"))
 
 # Core paths and models
 PERSIST_DIR: str = str(Path(os.getenv("PERSIST_DIR", "../chroma_db")).expanduser())
 MODEL_NAME: str = os.getenv("MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
 TOP_K: int = int(os.getenv("TOP_K", "5") or 5)
+EMBED_BATCH_SIZE: int = int(os.getenv("EMBED_BATCH_SIZE", "64") or 64)
+# Embedding device ("auto" picks cuda when available) and weights dtype
+# ("auto" = float16 on CUDA, float32 otherwise)
+DEVICE: str = os.getenv("DEVICE", "auto").strip().lower()
+EMB_DTYPE: str = os.getenv("EMB_DTYPE", "auto").strip().lower()
+# Candidates fetched per result before exact cosine reranking (1 = use Chroma's ranking as-is)
+RERANK_FETCH_FACTOR: int = max(1, int(os.getenv("RERANK_FETCH_FACTOR", "1") or 1))
 
 # Groq config
 GROQ_API_KEY: str | None = os.getenv("GROQ_API_KEY")
 GROQ_MODEL_NAME: str = os.getenv("GROQ_MODEL_NAME", "llama-3.1-8b-instant")
 
+# Optional FAISS retrieval (requires faiss-cpu); Chroma remains the durable store
+USE_FAISS: bool = os.getenv("USE_FAISS", "0").strip().lower() in ("1", "true", "yes")
+FAISS_HNSW_THRESHOLD: int = int(os.getenv("FAISS_HNSW_THRESHOLD", "50000") or 50000)
+# "float32" (exact) or "int8" (8-bit scalar-quantized vectors)
+FAISS_DTYPE: str = os.getenv("FAISS_DTYPE", "float32").strip().lower()
+
+# Query cache config (exact + semantic). QUERY_CACHE_SIZE=0 disables caching.
+QUERY_CACHE_TTL: int = int(os.getenv("QUERY_CACHE_TTL", "3600") or 3600)
+QUERY_CACHE_SIZE: int = int(os.getenv("QUERY_CACHE_SIZE", "256") or 256)
+QUERY_CACHE_SIM_THRESHOLD: float = float(os.getenv("QUERY_CACHE_SIM_THRESHOLD", "0.97") or 0.97)
+
 # PDF ingestion config
 PDF_LOADER: str = os.getenv("PDF_LOADER", "pymupdf").strip().lower()
+# Max chunks per Chroma add() call during ingestion (capped by the client's max batch size)
+INGEST_BATCH: int = int(os.getenv("INGEST_BATCH", "5000") or 5000)
 
 # Collections displayed in UI/CLI
 COLLECTIONS: List[Tuple[str, str]] = [
@@ -36,8 +58,19 @@ __all__ = [
     "PERSIST_DIR",
     "MODEL_NAME",
     "TOP_K",
+    "EMBED_BATCH_SIZE",
+    "DEVICE",
+    "EMB_DTYPE",
+    "RERANK_FETCH_FACTOR",
+    "USE_FAISS",
+    "FAISS_HNSW_THRESHOLD",
+    "FAISS_DTYPE",
     "GROQ_API_KEY",
     "GROQ_MODEL_NAME",
+    "QUERY_CACHE_TTL",
+    "QUERY_CACHE_SIZE",
+    "QUERY_CACHE_SIM_THRESHOLD",
     "PDF_LOADER",
+    "INGEST_BATCH",
     "COLLECTIONS",
 ]
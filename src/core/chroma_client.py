@@ -0,0 +1,24 @@
+"""Process-wide Chroma client, importable without the LangChain/embedding stack."""
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+
+import chromadb
+from chromadb.api import ClientAPI
+from chromadb.config import Settings
+
+from src.config import PERSIST_DIR
+
+
+@lru_cache(maxsize=None)
+def _client(persist_dir: str) -> ClientAPI:
+    return chromadb.PersistentClient(
+        path=persist_dir,
+        settings=Settings(anonymized_telemetry=False, is_persistent=True),
+    )
+
+
+def get_client(persist_dir: str = PERSIST_DIR) -> ClientAPI:
+    """Return the process-wide Chroma client for ``persist_dir`` (one SQLite connection per path)."""
+    return _client(str(Path(persist_dir).expanduser().resolve()))
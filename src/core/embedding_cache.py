@@ -0,0 +1,92 @@
+"""Memory-mapped snapshot of a collection's embeddings and documents.
+
+The first call dumps unit-normalized embeddings to
+``{persist_dir}/{collection}.embeddings.npy`` and the documents to
+``{collection}.docs.pkl``; later processes ``np.load(..., mmap_mode="r")`` the
+matrix instead of pulling every vector out of Chroma again. Snapshots are
+refreshed whenever the collection is recreated (new id) or its item count changes.
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import tempfile
+import warnings
+from pathlib import Path
+from typing import BinaryIO, Callable, List, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+def _paths(persist_dir: str, collection_name: str) -> Tuple[Path, Path]:
+    base = Path(persist_dir).expanduser()
+    return base / f"{collection_name}.embeddings.npy", base / f"{collection_name}.docs.pkl"
+
+
+def _atomic_write(path: Path, write: Callable[[BinaryIO], None]) -> None:
+    """Write ``path`` via a unique temp file, so concurrent dumps never share one."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            write(fh)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _dump(collection, persist_dir: str) -> Tuple[np.ndarray, List[Document]]:
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+    ids = data["ids"]
+    if not ids:
+        return np.empty((0, 0), dtype=np.float32), []
+
+    embeddings = np.asarray(data["embeddings"], dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = embeddings / np.where(norms > 0, norms, 1.0)
+    documents = [
+        Document(page_content=text or "", metadata=meta or {})
+        for text, meta in zip(data["documents"], data["metadatas"])
+    ]
+
+    emb_path, docs_path = _paths(persist_dir, collection.name)
+    state = {"collection_id": str(collection.id), "count": len(ids), "ids": ids, "documents": documents}
+    try:
+        _atomic_write(emb_path, lambda fh: np.save(fh, embeddings))
+        _atomic_write(docs_path, lambda fh: pickle.dump(state, fh, protocol=pickle.HIGHEST_PROTOCOL))
+        return np.load(emb_path, mmap_mode="r"), documents
+    except Exception as e:
+        warnings.warn(f"Could not write embedding cache for {collection.name}: {e}")
+        return embeddings, documents
+
+
+def load_or_dump(collection_name: str, persist_dir: str, collection=None) -> Tuple[np.ndarray, List[Document]]:
+    """Return ``(embeddings, documents)`` for a collection, memory-mapped when a fresh snapshot exists.
+
+    ``embeddings`` rows are unit-normalized and aligned with ``documents``. Pass
+    ``collection`` to reuse an open Chroma collection instead of opening a client.
+    """
+    persist_dir = str(Path(persist_dir).expanduser())
+    if collection is None:
+        from src.core.chroma_client import get_client
+
+        collection = get_client(persist_dir).get_collection(collection_name)
+    count = collection.count()
+    if count == 0:
+        return np.empty((0, 0), dtype=np.float32), []
+
+    emb_path, docs_path = _paths(persist_dir, collection_name)
+    if emb_path.exists() and docs_path.exists():
+        try:
+            with open(docs_path, "rb") as fh:
+                state = pickle.load(fh)
+            if state.get("collection_id") == str(collection.id) and state.get("count") == count:
+                embeddings = np.load(emb_path, mmap_mode="r")
+                if embeddings.shape[0] == count:
+                    return embeddings, state["documents"]
+        except Exception:
+            pass
+    return _dump(collection, persist_dir)
@@ -0,0 +1,171 @@
+"""FAISS index mirroring a Chroma collection for low-latency search.
+
+Chroma stays the durable store; the FAISS index is built from the
+memory-mapped embedding snapshot (see ``src.core.embedding_cache``) and
+persisted next to it as ``{persist_dir}/{collection}.faiss``, so later
+processes load it instead of rebuilding, together with a ``.meta.json``
+recording the collection id and item count it was built from. The index is
+rebuilt whenever either changes. With ``dtype="int8"`` vectors are stored
+with FAISS's 8-bit scalar quantizer (per-dimension ranges, 4x fewer bytes
+scanned per query) in ``{collection}.int8.faiss``.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import warnings
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from src.config import FAISS_DTYPE, FAISS_HNSW_THRESHOLD, PERSIST_DIR
+from src.core.embedding_cache import load_or_dump
+
+try:
+    import faiss
+except ImportError:  # faiss is optional (pip install faiss-cpu)
+    faiss = None
+
+
+class FaissStore:
+    """Inner-product FAISS index over unit-normalized embeddings plus their documents."""
+
+    def __init__(self, index, documents: List[Document]) -> None:
+        self.index = index
+        self.documents = documents
+
+    def search(self, vectors, k: int) -> List[List[Tuple[Document, float]]]:
+        """Return ``(doc, cosine similarity)`` lists for each row of ``vectors``."""
+        queries = np.ascontiguousarray(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+        if self.index is None or not self.documents:
+            return [[] for _ in range(queries.shape[0])]
+        faiss.normalize_L2(queries)
+        scores, ids = self.index.search(queries, min(k, len(self.documents)))
+        return [
+            [(self.documents[i], float(s)) for i, s in zip(row_ids, row_scores) if i >= 0]
+            for row_ids, row_scores in zip(ids, scores)
+        ]
+
+    def search_by_vector(self, vector, k: int) -> List[Tuple[Document, float]]:
+        return self.search(vector, k)[0]
+
+
+DTYPES = ("float32", "int8")
+
+
+def _index_path(persist_dir: str, collection_name: str, dtype: str = "float32") -> Path:
+    suffix = ".faiss" if dtype == "float32" else f".{dtype}.faiss"
+    return Path(persist_dir).expanduser() / f"{collection_name}{suffix}"
+
+
+def _meta_path(index_path: Path) -> Path:
+    return index_path.with_name(index_path.name + ".meta.json")
+
+
+def _collection_meta(collection) -> Dict[str, Any]:
+    return {"collection_id": str(collection.id), "count": collection.count()}
+
+
+def _build_index(embeddings: np.ndarray, dtype: str = "float32"):
+    dim = embeddings.shape[1]
+    hnsw = embeddings.shape[0] >= FAISS_HNSW_THRESHOLD
+    if dtype == "int8":
+        qtype = faiss.ScalarQuantizer.QT_8bit
+        if hnsw:
+            index = faiss.IndexHNSWSQ(dim, qtype, 32, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+    elif hnsw:
+        index = faiss.IndexHNSWFlat(dim, 32, faiss.METRIC_INNER_PRODUCT)
+    else:
+        index = faiss.IndexFlatIP(dim)
+    index.add(embeddings)
+    return index
+
+
+def build_faiss_store(collection, persist_dir: str, dtype: str = "float32") -> FaissStore:
+    """Build (and persist) a FAISS index from a Chroma collection's stored embeddings."""
+    embeddings, documents = load_or_dump(collection.name, persist_dir, collection)
+    if not documents:
+        return FaissStore(None, [])
+
+    # Snapshot rows are already unit-normalized; copy out of the read-only mmap for FAISS.
+    index = _build_index(np.array(embeddings, dtype=np.float32), dtype)
+    index_path = _index_path(persist_dir, collection.name, dtype)
+    try:
+        faiss.write_index(index, str(index_path))
+        _meta_path(index_path).write_text(json.dumps(_collection_meta(collection)))
+    except Exception as e:
+        warnings.warn(f"Could not persist FAISS index for {collection.name}: {e}")
+    return FaissStore(index, documents)
+
+
+def load_faiss_store(collection, persist_dir: str, dtype: str = "float32") -> Optional[FaissStore]:
+    """Load a persisted index if it was built from the collection's current id and item count."""
+    index_path = _index_path(persist_dir, collection.name, dtype)
+    meta_path = _meta_path(index_path)
+    if not index_path.exists() or not meta_path.exists():
+        return None
+    try:
+        if json.loads(meta_path.read_text()) != _collection_meta(collection):
+            return None
+        try:
+            index = faiss.read_index(str(index_path), faiss.IO_FLAG_MMAP)
+        except Exception:
+            index = faiss.read_index(str(index_path))
+        if index.ntotal != collection.count():
+            return None
+        _, documents = load_or_dump(collection.name, persist_dir, collection)
+        if len(documents) != index.ntotal:
+            return None
+        return FaissStore(index, documents)
+    except Exception:
+        return None
+
+
+_STORES: Dict[Tuple[str, str, str], Tuple[Dict[str, Any], FaissStore]] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_faiss_store(db, dtype: str = FAISS_DTYPE) -> FaissStore:
+    """Return the FAISS store for a LangChain Chroma ``db``, loading or building it as needed.
+
+    ``dtype`` is ``"float32"`` (exact inner product) or ``"int8"`` (8-bit scalar quantized).
+    """
+    if faiss is None:
+        raise ImportError("USE_FAISS requires the 'faiss-cpu' (or 'faiss-gpu') package")
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported FAISS dtype: {dtype!r} (expected one of {DTYPES})")
+    collection = db._collection
+    persist_dir = str(Path(getattr(db, "_persist_directory", None) or PERSIST_DIR).expanduser())
+    key = (persist_dir, collection.name, dtype)
+    meta = _collection_meta(collection)
+    with _STORES_LOCK:
+        cached = _STORES.get(key)
+        if cached and cached[0] == meta:
+            return cached[1]
+        store = load_faiss_store(collection, persist_dir, dtype) or build_faiss_store(collection, persist_dir, dtype)
+        _STORES[key] = (meta, store)
+        return store
+
+
+class FaissRetriever(BaseRetriever):
+    """LangChain retriever over the FAISS store of a Chroma ``db``.
+
+    The store is looked up per query, so long-lived retrievers pick up re-ingests.
+    """
+
+    db: Any
+    k: int = 4
+
+    def search_by_vector(self, vector) -> List[Document]:
+        """Return the ``k`` nearest documents for an already computed query embedding."""
+        return [doc for doc, _ in get_faiss_store(self.db).search_by_vector(vector, self.k)]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.search_by_vector(self.db.embeddings.embed_query(query))
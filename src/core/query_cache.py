@@ -0,0 +1,266 @@
+"""Exact-match and semantic cache for retrieval results."""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from src.config import (
+    PERSIST_DIR,
+    QUERY_CACHE_SIM_THRESHOLD,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL,
+)
+
+CACHE_FILENAME = "query_cache.pkl"
+# Seconds to coalesce writes before the cache file is rewritten.
+SAVE_DELAY = 5.0
+
+# Namespaces scope cache entries: (collection_name, collection_version, *parts).
+Namespace = Tuple[Hashable, ...]
+
+
+def cache_namespace(collection, *parts: Hashable) -> Namespace:
+    """Namespace for a Chroma ``collection`` that changes whenever it is rebuilt or re-ingested.
+
+    The version combines the collection id and item count, so entries cached
+    before an ingest (in this or any other process) are never served after it.
+    """
+    return (collection.name, f"{collection.id}:{collection.count()}", *parts)
+
+
+def _query_key(namespace: Namespace, query: str) -> str:
+    raw = "\x00".join([*(str(part) for part in namespace), query])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _unit(vector) -> np.ndarray:
+    vec = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0 else vec
+
+
+class QueryCache:
+    """Two-layer cache mapping queries to retrieval results.
+
+    The exact layer is keyed by SHA-256 of the query text. The semantic layer
+    keeps a matrix of previously seen (unit-normalized) query embeddings per
+    namespace and reuses the results of the closest prior query when cosine
+    similarity exceeds ``threshold``. Entries expire after ``ttl`` seconds
+    (``ttl <= 0`` disables expiry); ``max_entries <= 0`` disables caching.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        ttl: float = QUERY_CACHE_TTL,
+        max_entries: int = QUERY_CACHE_SIZE,
+        threshold: float = QUERY_CACHE_SIM_THRESHOLD,
+    ) -> None:
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.RLock()
+        # key -> (namespace, timestamp, payload)
+        self._exact: "OrderedDict[str, Tuple[Namespace, float, Any]]" = OrderedDict()
+        # namespace -> {"vectors": (n, d) float32, "times": [...], "payloads": [...]}
+        self._semantic: Dict[Namespace, Dict[str, Any]] = {}
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self.load()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _expired(self, ts: float, now: float) -> bool:
+        return self.ttl > 0 and now - ts > self.ttl
+
+    def get(self, namespace: Namespace, query: str) -> Optional[Any]:
+        """Return cached results for an exact query match, if fresh."""
+        key = _query_key(namespace, query)
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is None:
+                return None
+            _, ts, payload = entry
+            if self._expired(ts, time.time()):
+                del self._exact[key]
+                return None
+            self._exact.move_to_end(key)
+            return payload
+
+    def get_similar(self, namespace: Namespace, vector) -> Optional[Any]:
+        """Return cached results of the most similar prior query above threshold."""
+        with self._lock:
+            bucket = self._semantic.get(namespace)
+            if not bucket or not len(bucket["payloads"]):
+                return None
+            vectors = bucket["vectors"]
+            q = _unit(vector)
+            if vectors.shape[1] != q.shape[0]:
+                return None
+            sims = np.dot(vectors, q)
+            best = int(np.argmax(sims))
+            if float(sims[best]) < self.threshold:
+                return None
+            if self._expired(bucket["times"][best], time.time()):
+                return None
+            return bucket["payloads"][best]
+
+    def put(self, namespace: Namespace, query: str, vector, payload: Any, semantic: bool = True) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self._drop_stale(namespace)
+            key = _query_key(namespace, query)
+            self._exact[key] = (namespace, now, payload)
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.max_entries:
+                self._exact.popitem(last=False)
+
+            if semantic and vector is not None:
+                q = _unit(vector)[None, :]
+                bucket = self._semantic.get(namespace)
+                if bucket is None or bucket["vectors"].shape[1] != q.shape[1]:
+                    bucket = {"vectors": q, "times": [now], "payloads": [payload]}
+                else:
+                    bucket["vectors"] = np.vstack([bucket["vectors"], q])
+                    bucket["times"].append(now)
+                    bucket["payloads"].append(payload)
+                overflow = len(bucket["payloads"]) - self.max_entries
+                if overflow > 0:
+                    bucket["vectors"] = bucket["vectors"][overflow:]
+                    bucket["times"] = bucket["times"][overflow:]
+                    bucket["payloads"] = bucket["payloads"][overflow:]
+                self._semantic[namespace] = bucket
+        self._schedule_save()
+
+    def fetch(
+        self,
+        namespace: Namespace,
+        query: str,
+        embed: Callable[[str], List[float]],
+        search: Callable[[str, np.ndarray], Any],
+    ) -> Any:
+        """Return cached results for ``query`` or compute them via ``search``.
+
+        ``embed`` is only called on an exact-cache miss; ``search`` receives the
+        query and its embedding and is only called when both layers miss.
+        """
+        if not self.enabled:
+            return search(query, np.asarray(embed(query), dtype=np.float32))
+        hit = self.get(namespace, query)
+        if hit is not None:
+            return hit
+        vector = np.asarray(embed(query), dtype=np.float32)
+        hit = self.get_similar(namespace, vector)
+        if hit is not None:
+            self.put(namespace, query, vector, hit, semantic=False)
+            return hit
+        results = search(query, vector)
+        self.put(namespace, query, vector, results)
+        return results
+
+    def _drop_stale(self, namespace: Namespace) -> None:
+        """Drop entries cached for an older version of ``namespace``'s collection."""
+        if len(namespace) < 2:
+            return
+        name, version = namespace[0], namespace[1]
+        for key in [k for k, (ns, _, _) in self._exact.items() if ns[:1] == (name,) and ns[1:2] != (version,)]:
+            del self._exact[key]
+        for ns in [ns for ns in self._semantic if ns[:1] == (name,) and ns[1:2] != (version,)]:
+            del self._semantic[ns]
+
+    def invalidate(self, collection_name: str | None = None) -> None:
+        """Drop entries for one collection (first namespace element), or all."""
+        with self._lock:
+            if collection_name is None:
+                self._exact.clear()
+                self._semantic.clear()
+            else:
+                for key in [k for k, (ns, _, _) in self._exact.items() if ns and ns[0] == collection_name]:
+                    del self._exact[key]
+                for ns in [ns for ns in self._semantic if ns and ns[0] == collection_name]:
+                    del self._semantic[ns]
+            self._dirty = True
+        self.save()
+
+    def load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, "rb") as fh:
+                state = pickle.load(fh)
+        except Exception as e:
+            warnings.warn(f"Ignoring unreadable query cache {self.path}: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for key, (ns, ts, payload) in state.get("exact", {}).items():
+                if not self._expired(ts, now):
+                    self._exact[key] = (ns, ts, payload)
+            self._semantic.update(state.get("semantic", {}))
+
+    def _schedule_save(self) -> None:
+        """Mark the cache dirty and write it once after ``SAVE_DELAY`` seconds."""
+        if not self.path:
+            return
+        with self._lock:
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(SAVE_DELAY, self.save)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def save(self) -> None:
+        """Write pending changes to ``path`` (atomically, via a unique temp file)."""
+        if not self.path:
+            return
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            state = {"exact": dict(self._exact), "semantic": dict(self._semantic)}
+            tmp = None
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(prefix=self.path.name + ".", suffix=".tmp", dir=self.path.parent)
+                with os.fdopen(fd, "wb") as fh:
+                    pickle.dump(state, fh, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, self.path)
+                self._dirty = False
+            except Exception as e:
+                if tmp and os.path.exists(tmp):
+                    os.unlink(tmp)
+                warnings.warn(f"Could not write query cache {self.path}: {e}")
+
+
+_CACHES: Dict[str, QueryCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_query_cache(persist_dir: str | None = None) -> QueryCache:
+    """Return the process-wide cache persisted at ``persist_dir/query_cache.pkl``."""
+    persist_dir = str(Path(persist_dir or PERSIST_DIR).expanduser())
+    with _CACHES_LOCK:
+        cache = _CACHES.get(persist_dir)
+        if cache is None:
+            cache = QueryCache(path=Path(persist_dir) / CACHE_FILENAME)
+            atexit.register(cache.save)
+            _CACHES[persist_dir] = cache
+        return cache
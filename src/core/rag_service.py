@@ -1,20 +1,166 @@
 """RAG chain setup service."""
 from __future__ import annotations
 
-from langchain_classic.chains import RetrievalQA
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Iterator, List, Tuple
+
+import httpx
+from langchain_core.messages import BaseMessage
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.retrievers import BaseRetriever
 from langchain_groq import ChatGroq
 
-from src.config import GROQ_API_KEY, GROQ_MODEL_NAME
+from src.config import GROQ_API_KEY, GROQ_MODEL_NAME, PERSIST_DIR, USE_FAISS
+from src.core.faiss_store import FaissRetriever
+from src.core.query_cache import QueryCache, cache_namespace, get_query_cache
+from src.core.utils import normalize_query, retrieval_backend_tag
+from src.core.vectorstore import LeanChromaRetriever
+
+# Same instructions as the "stuff" QA chain's default chat prompt.
+RAG_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "Use the following pieces of context to answer the user's question. \n"
+            "If you don't know the answer, just say that you don't know, don't try to make up an answer.\n"
+            "----------------\n{context}",
+        ),
+        ("human", "{question}"),
+    ]
+)
+
+
+class CachedRetriever(BaseRetriever):
+    """Retriever that consults the query cache and searches ``retriever`` only on a miss.
+
+    ``retriever`` is a :class:`LeanChromaRetriever` or :class:`FaissRetriever`;
+    the query embedding computed for the cache lookup is reused for its search.
+    """
+
+    retriever: Any
+    collection: Any
+    embeddings: Any
+    cache: QueryCache
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.cache.fetch(
+            cache_namespace(self.collection, self.retriever.k, "docs", retrieval_backend_tag()),
+            normalize_query(query),
+            self.embeddings.embed_query,
+            lambda _query, vector: self.retriever.search_by_vector(vector),
+        )
+
+
+_KEEPALIVE_EXPIRY = 60.0
+
+
+class _PooledClient(httpx.Client):
+    """httpx client that remembers when it last sent a request, to tell if its pool has gone cold."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._last_used = float("-inf")
+        self._last_used_lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        self._last_used = time.monotonic()
+        return super().send(request, **kwargs)
+
+    def claim_warm_up(self) -> bool:
+        """True (at most once per idle period) if kept-alive connections have likely expired."""
+        with self._last_used_lock:
+            now = time.monotonic()
+            # A few seconds' margin so a connection doesn't expire while retrieval runs.
+            if now - self._last_used < _KEEPALIVE_EXPIRY - 5.0:
+                return False
+            self._last_used = now
+            return True
+
+
+def _http_client() -> httpx.Client:
+    limits = httpx.Limits(max_keepalive_connections=16, keepalive_expiry=_KEEPALIVE_EXPIRY)
+    try:
+        return _PooledClient(http2=True, limits=limits)
+    except ImportError:  # HTTP/2 needs the optional 'h2' package
+        return _PooledClient(limits=limits)
 
 
-def setup_rag_chain(db, top_k: int, groq_api_key: str | None = None, groq_model: str | None = None):
-    """Set up RAG chain with Groq LLM, using config defaults when not provided."""
+def _warm_up(llm: ChatGroq) -> None:
+    """Open the Groq HTTPS connection without generating tokens."""
+    try:
+        llm.client._client.models.list()
+    except Exception:
+        pass
+
+
+def _warm_up_if_cold(llm: ChatGroq) -> None:
+    """Re-open ``llm``'s connection in the background if its pool has been idle past keep-alive."""
+    client = getattr(llm, "http_client", None)
+    if isinstance(client, _PooledClient) and client.claim_warm_up():
+        threading.Thread(target=_warm_up, args=(llm,), daemon=True).start()
+
+
+@lru_cache(maxsize=4)
+def _get_llm(model: str, api_key: str) -> ChatGroq:
+    """Shared streaming Groq client per (model, key), reusing one keep-alive connection pool.
+
+    Each new client warms its connection in the background, so the TLS
+    handshake happens while the user is still typing the first question.
+    """
+    llm = ChatGroq(model=model, api_key=api_key, streaming=True, http_client=_http_client())
+    _warm_up_if_cold(llm)
+    return llm
+
+
+def _resolve_llm(groq_api_key: str | None, groq_model: str | None) -> ChatGroq:
     api_key = groq_api_key or GROQ_API_KEY
     model = groq_model or GROQ_MODEL_NAME
     if not api_key:
         raise ValueError("GROQ_API_KEY not set")
+    return _get_llm(model, api_key)
+
+
+def _build_retriever(db, top_k: int) -> BaseRetriever:
+    if USE_FAISS:
+        retriever = FaissRetriever(db=db, k=top_k)
+    else:
+        retriever = LeanChromaRetriever(collection=db._collection, embeddings=db.embeddings, k=top_k)
+    return CachedRetriever(
+        retriever=retriever,
+        collection=db._collection,
+        embeddings=db.embeddings,
+        cache=get_query_cache(getattr(db, "_persist_directory", None) or PERSIST_DIR),
+    )
+
+
+def setup_rag_chain_stream(
+    db, top_k: int, groq_api_key: str | None = None, groq_model: str | None = None
+) -> Tuple[BaseRetriever, ChatGroq, ChatPromptTemplate]:
+    """Return ``(retriever, llm, prompt)`` for token-by-token answers via :func:`stream_answer`."""
+    return _build_retriever(db, top_k), _resolve_llm(groq_api_key, groq_model), RAG_PROMPT
+
+
+def _prepare_messages(
+    retriever: BaseRetriever, llm: ChatGroq, prompt: ChatPromptTemplate, question: str
+) -> List[BaseMessage]:
+    """Retrieve context for ``question`` and build the prompt messages.
+
+    When the Groq pool has gone cold (e.g. a cached chain idle for over a
+    minute), the connection is re-opened in parallel with retrieval.
+    """
+    _warm_up_if_cold(llm)
+    docs = retriever.invoke(question)
+    context = "\n\n".join(d.page_content for d in docs)
+    return prompt.format_messages(context=context, question=question)
+
 
-    llm = ChatGroq(model=model, api_key=api_key)
-    retriever = db.as_retriever(search_kwargs={"k": top_k})
-    qa_chain = RetrievalQA.from_chain_type(llm=llm, chain_type="stuff", retriever=retriever)
-    return qa_chain
+def stream_answer(retriever: BaseRetriever, llm: ChatGroq, prompt: ChatPromptTemplate, question: str) -> Iterator[str]:
+    """Retrieve context for ``question`` and yield the answer text as Groq streams it."""
+    messages = _prepare_messages(retriever, llm, prompt, question)
+    for chunk in llm.stream(messages):
+        if chunk.content:
+            yield chunk.content
@@ -0,0 +1,67 @@
+"""Exact cosine top-k reranking of retrieval candidates.
+
+Uses a Numba-compiled kernel when ``numba`` is installed and falls back to
+NumPy otherwise. Compiled artifacts are cached under ``NUMBA_CACHE_DIR``
+(set in ``src.config``) so only the very first call pays the JIT cost.
+"""
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+import src.config  # noqa: F401  (sets NUMBA_CACHE_DIR before numba is imported)
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional
+    njit = None
+
+
+def _cosine_topk_numpy(q: np.ndarray, m: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    denom = np.linalg.norm(m, axis=1) * np.linalg.norm(q)
+    dots = m @ q
+    scores = np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0).astype(np.float32)
+    k = min(k, scores.shape[0])
+    top = np.argpartition(-scores, k - 1)[:k] if k else np.empty(0, dtype=np.int64)
+    order = top[np.argsort(-scores[top], kind="stable")].astype(np.int64)
+    return order, scores[order]
+
+
+if njit is not None:
+
+    @njit(cache=True, fastmath=True, parallel=True)
+    def _cosine_topk_jit(q, m, k):
+        n, d = m.shape
+        q_norm = 0.0
+        for j in range(d):
+            q_norm += q[j] * q[j]
+        q_norm = np.sqrt(q_norm)
+
+        scores = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            dot = 0.0
+            m_norm = 0.0
+            for j in range(d):
+                dot += m[i, j] * q[j]
+                m_norm += m[i, j] * m[i, j]
+            denom = np.sqrt(m_norm) * q_norm
+            scores[i] = dot / denom if denom > 0 else 0.0
+
+        k = min(k, n)
+        order = np.argsort(-scores)[:k].astype(np.int64)
+        return order, scores[order]
+
+
+def cosine_topk(query, matrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return ``(indices, scores)`` of the ``k`` rows of ``matrix`` most cosine-similar to ``query``.
+
+    Results are ordered by descending similarity.
+    """
+    q = np.ascontiguousarray(query, dtype=np.float32).ravel()
+    m = np.ascontiguousarray(matrix, dtype=np.float32)
+    if m.ndim != 2 or m.shape[0] == 0 or k <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    if njit is not None:
+        return _cosine_topk_jit(q, m, k)
+    return _cosine_topk_numpy(q, m, k)
@@ -1,33 +1,184 @@
-"""Common utilities for UI/CLI display and retrieval helpers."""
+"""Common utilities for UI/CLI display and retrieval helpers.
+
+Retrieval backends (Numba reranker, FAISS, LangChain documents) are imported
+inside the functions that use them so that listing collections stays cheap.
+"""
 import os
-from typing import Any, Dict, List
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+from src.config import COLLECTIONS, FAISS_DTYPE, PERSIST_DIR, RERANK_FETCH_FACTOR, USE_FAISS
+from src.core.query_cache import cache_namespace, get_query_cache
+
+
+def _iter_file_sizes(path: str) -> Iterator[int]:
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from _iter_file_sizes(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+    except OSError:
+        pass
+
+
+def _dir_signature(path: str) -> tuple:
+    """Cheap change marker: mtimes of ``path`` and its direct children (e.g. chroma.sqlite3)."""
+    try:
+        with os.scandir(path) as it:
+            children = tuple(sorted((e.name, e.stat(follow_symlinks=False).st_mtime_ns) for e in it))
+        return os.stat(path).st_mtime_ns, children
+    except OSError:
+        return None, ()
 
-from chromadb import PersistentClient
 
-from src.config import COLLECTIONS
+@lru_cache(maxsize=8)
+def _directory_size_bytes(path: str, signature: tuple) -> int:
+    return sum(_iter_file_sizes(path))
 
 
 def get_directory_size(path: str) -> str:
-    total_size = 0
-    for dirpath, dirnames, filenames in os.walk(path):
-        for f in filenames:
-            fp = os.path.join(dirpath, f)
-            try:
-                total_size += os.path.getsize(fp)
-            except OSError:
-                pass
+    total_size = _directory_size_bytes(path, _dir_signature(path))
     if total_size < 1024 * 1024:
         return f"{total_size / 1024:.2f} KB"
     else:
         return f"{total_size / (1024 * 1024):.2f} MB"
 
 
+def _rerank_candidates(vector, texts, metas, embeddings, top_k: int) -> list:
+    """Rerank one query's Chroma candidates by exact cosine similarity and keep ``top_k``."""
+    from langchain_core.documents import Document
+
+    from src.core.rerank import cosine_topk
+
+    if embeddings is None or not len(embeddings):
+        return []
+    idx, scores = cosine_topk(vector, np.asarray(embeddings, dtype=np.float32), top_k)
+    return [
+        (Document(page_content=texts[i] or "", metadata=metas[i] or {}), float(score))
+        for i, score in zip(idx, scores)
+    ]
+
+
+def _distance_to_similarity(distance: float, space: str) -> float:
+    # Stored vectors are unit-normalized: "ip"/"cosine" distance is 1 - cos, squared "l2" is 2 - 2 cos.
+    return 1.0 - distance / 2.0 if space == "l2" else 1.0 - distance
+
+
+def _search_by_vectors(db, vectors, top_k: int) -> List[list]:
+    """Search several query embeddings in one backend round-trip; one ``(doc, score)`` list per vector."""
+    if USE_FAISS:
+        from src.core.faiss_store import get_faiss_store
+
+        return get_faiss_store(db).search(vectors, top_k)
+    embeddings = [[float(x) for x in vector] for vector in vectors]
+    if RERANK_FETCH_FACTOR > 1:
+        res = db._collection.query(
+            query_embeddings=embeddings,
+            n_results=top_k * RERANK_FETCH_FACTOR,
+            include=["documents", "metadatas", "embeddings"],
+        )
+        return [
+            _rerank_candidates(vector, texts, metas, embeds, top_k)
+            for vector, texts, metas, embeds in zip(vectors, res["documents"], res["metadatas"], res["embeddings"])
+        ]
+
+    from langchain_core.documents import Document
+
+    # Chroma's order already matches cosine order for normalized vectors; only convert the scores.
+    res = db._collection.query(
+        query_embeddings=embeddings,
+        n_results=top_k,
+        include=["documents", "metadatas", "distances"],
+    )
+    space = (db._collection.metadata or {}).get("hnsw:space", "l2")
+    return [
+        [
+            (Document(page_content=text or "", metadata=meta or {}), _distance_to_similarity(dist, space))
+            for text, meta, dist in zip(texts, metas, dists)
+        ]
+        for texts, metas, dists in zip(res["documents"], res["metadatas"], res["distances"])
+    ]
+
+
+def _search_by_vector(db, vector, top_k: int) -> list:
+    return _search_by_vectors(db, [vector], top_k)[0]
+
+
+def normalize_query(q: str) -> str:
+    """Canonical form of a query for embedding and cache keys (case, whitespace, trailing punctuation)."""
+    return re.sub(r"\s+", " ", q).strip().lower().rstrip("?.! ")
+
+
+def _query_cache_for(db):
+    return get_query_cache(getattr(db, "_persist_directory", None) or PERSIST_DIR)
+
+
+def retrieval_backend_tag() -> str:
+    """Search backend and settings that shape results; part of every query-cache namespace."""
+    if USE_FAISS:
+        return f"faiss:{FAISS_DTYPE}"
+    return f"chroma:rerank{RERANK_FETCH_FACTOR}"
+
+
+def _scored_namespace(db, top_k: int):
+    return cache_namespace(db._collection, top_k, "scored", retrieval_backend_tag())
+
+
 def perform_retrieve(db, query: str, top_k: int) -> list:
-    try:
-        results = db.similarity_search_with_score(query, k=top_k)
-    except Exception:
-        docs = db.similarity_search(query, k=top_k)
-        results = [(d, None) for d in docs]
+    """Return ``(doc, score)`` pairs for ``query``, served from the query cache when possible.
+
+    Scores are cosine similarities (higher is better). With ``RERANK_FETCH_FACTOR > 1``
+    the ``top_k * RERANK_FETCH_FACTOR`` nearest candidates are reranked exactly.
+    """
+    query = normalize_query(query)
+    cache = _query_cache_for(db)
+    return cache.fetch(
+        _scored_namespace(db, top_k),
+        query,
+        db.embeddings.embed_query,
+        lambda _query, vector: _search_by_vector(db, vector, top_k),
+    )
+
+
+def perform_retrieve_batch(db, queries: List[str], top_k: int) -> List[list]:
+    """Retrieve ``(doc, score)`` pairs for several queries at once.
+
+    Cache misses are embedded in a single batch and searched in one backend
+    round-trip; results are returned in the order of ``queries``.
+    """
+    queries = [normalize_query(q) for q in queries]
+    cache = _query_cache_for(db)
+    namespace = _scored_namespace(db, top_k)
+    results: List[Any] = [cache.get(namespace, q) for q in queries]
+    pending = [i for i, r in enumerate(results) if r is None]
+    if not pending:
+        return results
+
+    vectors = db.embeddings.embed_documents([queries[i] for i in pending])
+    to_search = []
+    for i, vector in zip(pending, vectors):
+        hit = cache.get_similar(namespace, vector)
+        if hit is not None:
+            results[i] = hit
+            cache.put(namespace, queries[i], vector, hit, semantic=False)
+        else:
+            to_search.append((i, vector))
+    if not to_search:
+        return results
+
+    searched = _search_by_vectors(db, [vector for _, vector in to_search], top_k)
+    for (i, vector), hits in zip(to_search, searched):
+        results[i] = hits
+        cache.put(namespace, queries[i], vector, hits)
     return results
 
 
@@ -44,6 +195,25 @@ def _display_collection_info(db, collection_name: str, persist_dir: str, model_n
         write_func(f"Error retrieving collection info: {e}")
 
 
+def _snippet(text: str) -> str:
+    return text if len(text) < 800 else text[:800] + "..."
+
+
+def format_results(results: list) -> str:
+    """Render results as one plain-text block (same layout as ``display_results`` with ``print``)."""
+    out = []
+    for i, (doc, score) in enumerate(results, start=1):
+        src = doc.metadata.get("source") if getattr(doc, "metadata", None) else None
+        out.append(
+            f"\nResult #{i}\n"
+            + (f"Score: {score}\n" if score is not None else "")
+            + (f"Source: {src}\n" if src else "")
+            + _snippet(doc.page_content.strip())
+            + "\n"
+        )
+    return "".join(out)
+
+
 def display_results(results: list, subheader_func, write_func):
     for i, (doc, score) in enumerate(results, start=1):
         subheader_func(f"Result #{i}")
@@ -52,38 +222,45 @@ def display_results(results: list, subheader_func, write_func):
         src = doc.metadata.get("source") if getattr(doc, "metadata", None) else None
         if src:
             write_func(f"Source: {src}")
-        text = doc.page_content.strip()
-        snippet = text if len(text) < 800 else text[:800] + "..."
-        write_func(snippet)
+        write_func(_snippet(doc.page_content.strip()))
+
+
+def _collection_stats(coll, sample_limit: int) -> Dict[str, Any]:
+    info: Dict[str, Any] = {
+        "name": getattr(coll, "name", None),
+        "count": 0,
+        "sample_sources": [],
+    }
+    try:
+        info["count"] = coll.count()
+    except Exception:
+        info["count"] = None
+    try:
+        sample = coll.get(limit=sample_limit, include=["metadatas"])
+        metas = sample.get("metadatas") or []
+        sources = {
+            m.get("source")
+            for m in metas
+            if isinstance(m, dict) and m.get("source")
+        }
+        info["sample_sources"] = sorted(sources)
+    except Exception:
+        info["sample_sources"] = []
+    return info
 
 
 def list_collections_with_stats(persist_dir: str, sample_limit: int = 5) -> List[Dict[str, Any]]:
     """Return collection stats from Chroma persistent client.
 
-    Each entry contains: name, count, sample_sources.
+    Each entry contains: name, count, sample_sources. Per-collection lookups
+    run concurrently (Chroma's Rust core releases the GIL); order follows
+    ``list_collections``.
     """
-    client = PersistentClient(path=persist_dir)
-    results: List[Dict[str, Any]] = []
-    for coll in client.list_collections():
-        info: Dict[str, Any] = {
-            "name": getattr(coll, "name", None),
-            "count": 0,
-            "sample_sources": [],
-        }
-        try:
-            info["count"] = coll.count()
-        except Exception:
-            info["count"] = None
-        try:
-            sample = coll.get(limit=sample_limit, include=["metadatas"])
-            metas = sample.get("metadatas") or []
-            sources = {
-                m.get("source")
-                for m in metas
-                if isinstance(m, dict) and m.get("source")
-            }
-            info["sample_sources"] = sorted(sources)
-        except Exception:
-            info["sample_sources"] = []
-        results.append(info)
-    return results
+    from src.core.chroma_client import get_client
+
+    client = get_client(persist_dir)
+    collections = client.list_collections()
+    if len(collections) <= 1:
+        return [_collection_stats(coll, sample_limit) for coll in collections]
+    with ThreadPoolExecutor(max_workers=min(8, len(collections))) as pool:
+        return list(pool.map(lambda coll: _collection_stats(coll, sample_limit), collections))
@@ -1,16 +1,99 @@
 """Vector store and embeddings factories."""
 from __future__ import annotations
 
+import threading
+from functools import lru_cache
+from typing import Any, List
+
 from langchain_huggingface.embeddings import HuggingFaceEmbeddings
 from langchain_chroma.vectorstores import Chroma
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from src.config import DEVICE, EMB_DTYPE, EMBED_BATCH_SIZE, MODEL_NAME, PERSIST_DIR
+from src.core.chroma_client import get_client
+
+
+def _model_kwargs() -> dict:
+    """Resolve DEVICE/EMB_DTYPE into SentenceTransformer kwargs (fp16 on CUDA by default)."""
+    try:
+        import torch
+    except ImportError:  # CPU-only installs without torch importable here
+        return {"device": "cpu" if DEVICE == "auto" else DEVICE}
+
+    device = DEVICE
+    if device == "auto":
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    dtype = EMB_DTYPE
+    if dtype == "auto":
+        dtype = "float16" if device.startswith("cuda") else "float32"
+
+    kwargs: dict = {"device": device}
+    if dtype == "float16":
+        kwargs["model_kwargs"] = {"torch_dtype": torch.float16}
+    return kwargs
+
+
+def get_embeddings(model_name: str | None = None) -> HuggingFaceEmbeddings:
+    """Return the process-wide embeddings instance for ``model_name`` (model loads once)."""
+    return _load_embeddings(model_name or MODEL_NAME)
 
-from src.config import MODEL_NAME, PERSIST_DIR
 
+@lru_cache(maxsize=None)
+def _load_embeddings(model_name: str) -> HuggingFaceEmbeddings:
+    # Keyed by the resolved name, so get_embeddings() and get_embeddings(MODEL_NAME) share one model.
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs=_model_kwargs(),
+        encode_kwargs={"batch_size": EMBED_BATCH_SIZE, "normalize_embeddings": True},
+    )
 
-def get_embeddings() -> HuggingFaceEmbeddings:
-    return HuggingFaceEmbeddings(model_name=MODEL_NAME)
 
+def _warm_up(collection) -> None:
+    """Query by one stored vector so the HNSW index is loaded before real queries.
 
+    Only Chroma is touched; the shared embedding model is left to the caller's
+    thread (HF fast tokenizers reject concurrent first use).
+    """
+    try:
+        sample = collection.get(limit=1, include=["embeddings"])
+        if len(sample["embeddings"]):
+            collection.query(query_embeddings=[list(sample["embeddings"][0])], n_results=1, include=["distances"])
+    except Exception:
+        pass
+
+
+@lru_cache(maxsize=None)
 def get_db(collection_name: str) -> Chroma:
     emb = get_embeddings()
-    return Chroma(persist_directory=PERSIST_DIR, embedding_function=emb, collection_name=collection_name)
+    db = Chroma(client=get_client(PERSIST_DIR), embedding_function=emb, collection_name=collection_name)
+    threading.Thread(target=_warm_up, args=(db._collection,), name="chroma-warmup", daemon=True).start()
+    return db
+
+
+class LeanChromaRetriever(BaseRetriever):
+    """Retriever that queries a Chroma collection for documents and metadata only.
+
+    Skips the distances/embeddings that ``Chroma.as_retriever`` pulls across
+    the Rust/Python boundary but RAG never uses.
+    """
+
+    collection: Any
+    embeddings: Any
+    k: int = 4
+
+    def search_by_vector(self, vector) -> List[Document]:
+        """Return the ``k`` nearest documents for an already computed query embedding."""
+        res = self.collection.query(
+            query_embeddings=[[float(x) for x in vector]],
+            n_results=self.k,
+            include=["documents", "metadatas"],
+        )
+        return [
+            Document(page_content=text or "", metadata=meta or {})
+            for text, meta in zip(res["documents"][0], res["metadatas"][0])
+        ]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.search_by_vector(self.embeddings.embed_query(query))
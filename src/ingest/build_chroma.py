@@ -7,9 +7,12 @@ Reads configuration from .env via src/config and supports PDF loader selection.
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 import os
+import uuid
+import warnings
 
+import numpy as np
 from dotenv import load_dotenv
 
 from langchain_community.document_loaders import (
@@ -18,12 +21,39 @@ from langchain_community.document_loaders import (
     PyMuPDFLoader,
 )
 from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
-from langchain_huggingface.embeddings import HuggingFaceEmbeddings
 from langchain_chroma.vectorstores import Chroma
+from langchain_core.documents import Document
+
+from src.config import INGEST_BATCH
+from src.core.chroma_client import get_client
+from src.core.query_cache import get_query_cache
+from src.core.vectorstore import get_embeddings
 
 load_dotenv()
 
 
+def _split_by_tokens(
+    docs: List[Document], chunk_size: int, chunk_overlap: int, encoding_name: str
+) -> List[Document]:
+    """Split pages into fixed token windows using tiktoken's Rust batch encoder."""
+    import tiktoken
+
+    if chunk_overlap >= chunk_size:
+        raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+    enc = tiktoken.get_encoding(encoding_name)
+    step = chunk_size - chunk_overlap
+    token_lists = enc.encode_ordinary_batch([doc.page_content for doc in docs])
+    chunks: List[Document] = []
+    for doc, tokens in zip(docs, token_lists):
+        for start in range(0, len(tokens), step):
+            text = enc.decode(tokens[start:start + chunk_size])
+            if text.strip():
+                chunks.append(Document(page_content=text, metadata=dict(doc.metadata or {})))
+            if start + chunk_size >= len(tokens):
+                break
+    return chunks
+
+
 def build_chroma_from_pdf(
     pdf_path: str,
     persist_dir: str,
@@ -32,6 +62,7 @@ def build_chroma_from_pdf(
     chunk_overlap: int = 100,
     encoding_name: str = "cl100k_base",
     collection_name: Optional[str] = None,
+    batch_size: int = INGEST_BATCH,
 ) -> None:
     loader_choice = os.getenv("PDF_LOADER", "pymupdf").strip().lower()
     if loader_choice == "pdfplumber":
@@ -43,10 +74,25 @@ def build_chroma_from_pdf(
 
     docs = loader.load()
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size, chunk_overlap=chunk_overlap
-    )
-    docs_split = splitter.split_documents(docs)
+    embeddings = get_embeddings(model_name)
+
+    # CHUNK_UNIT=tokens sizes chunks in `encoding_name` tokens instead of characters.
+    if os.getenv("CHUNK_UNIT", "chars").strip().lower() == "tokens":
+        # The embedding model truncates longer inputs, so text past its limit would never be searchable.
+        max_seq = getattr(getattr(embeddings, "_client", None), "max_seq_length", None)
+        if max_seq and chunk_size > max_seq:
+            warnings.warn(
+                f"chunk_size={chunk_size} tokens exceeds the embedding model's {max_seq}-token input limit; "
+                f"using chunk_size={max_seq}."
+            )
+            chunk_overlap = min(chunk_overlap, max_seq // 4)
+            chunk_size = max_seq
+        docs_split = _split_by_tokens(docs, chunk_size, chunk_overlap, encoding_name)
+    else:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+        docs_split = splitter.split_documents(docs)
 
     for doc in docs_split:
         md = dict(doc.metadata or {})
@@ -55,19 +101,108 @@ def build_chroma_from_pdf(
 
     print(f"Created {len(docs_split)} chunks (chunk_size={chunk_size}, overlap={chunk_overlap}).")
 
-    embeddings = HuggingFaceEmbeddings(model_name=model_name)
+    collection_name = collection_name or Path(pdf_path).stem
+
+    # Embed every chunk in one batched pass, then write in large add() batches:
+    # per-call overhead in Chroma dominates small inserts.
+    texts = [doc.page_content for doc in docs_split]
+    metadatas = [doc.metadata for doc in docs_split]
+    vectors = embeddings.embed_documents(texts)
+    ids = [str(uuid.uuid4()) for _ in texts]
 
     persist_dir = str(Path(persist_dir).expanduser())
-    vectordb = Chroma.from_documents(
-        documents=docs_split,
-        embedding=embeddings,
-        persist_directory=persist_dir,
+    # Embeddings are unit-normalized (see get_embeddings), so inner product ranks
+    # like cosine while skipping the norm computation in HNSW.
+    vectordb = Chroma(
+        client=get_client(persist_dir),
+        embedding_function=embeddings,
         collection_name=collection_name,
+        collection_metadata={"hnsw:space": "ip"},
     )
+    collection = vectordb._collection
+    try:
+        batch_size = min(batch_size, collection._client.get_max_batch_size())
+    except Exception:
+        pass
+    batch_size = max(1, batch_size)
+    for i in range(0, len(ids), batch_size):
+        collection.add(
+            ids=ids[i:i + batch_size],
+            embeddings=vectors[i:i + batch_size],
+            documents=texts[i:i + batch_size],
+            metadatas=metadatas[i:i + batch_size],
+        )
+    # Cached retrieval results for this collection are stale once new chunks land.
+    get_query_cache(persist_dir).invalidate(collection_name)
 
     print(f"Chroma DB persisted to: {persist_dir} (collection: {collection_name})")
 
 
+def migrate_collection_to_ip(persist_dir: str, collection_name: str, batch_size: int = INGEST_BATCH) -> None:
+    """Rewrite an existing collection with unit-normalized vectors in an ``ip`` HNSW space.
+
+    Chroma cannot change a collection's distance function in place, so the data
+    is copied into ``<name>__ip``; the original is then renamed to
+    ``<name>__backup``, the copy takes its name and the backup is deleted.
+    Rerunning after an interruption resumes from the step that was reached.
+    """
+    persist_dir = str(Path(persist_dir).expanduser())
+    client = get_client(persist_dir)
+    ip_name, backup_name = f"{collection_name}__ip", f"{collection_name}__backup"
+    names = {getattr(c, "name", c) for c in client.list_collections()}
+
+    if collection_name not in names:
+        if backup_name not in names:
+            raise ValueError(f"Collection {collection_name} does not exist")
+        if ip_name in names:
+            # Interrupted between the renames: the copy is complete, finish the swap.
+            client.get_collection(ip_name).modify(name=collection_name)
+            client.delete_collection(backup_name)
+            get_query_cache(persist_dir).invalidate(collection_name)
+            print(f"Finished migrating {collection_name} to inner-product space.")
+            return
+        client.get_collection(backup_name).modify(name=collection_name)
+        names = (names - {backup_name}) | {collection_name}
+
+    source = client.get_collection(collection_name)
+    metadata = dict(source.metadata or {})
+    if metadata.get("hnsw:space") == "ip":
+        if backup_name in names:
+            # Interrupted after the swap: only the old data is left to drop.
+            client.delete_collection(backup_name)
+        print(f"Collection {collection_name} already uses inner product.")
+        return
+    if backup_name in names:
+        raise ValueError(f"Collection {backup_name} already exists; remove it before migrating {collection_name}")
+    if ip_name in names:
+        # Partial copy left by an interrupted run; the original is intact, so start over.
+        client.delete_collection(ip_name)
+
+    data = source.get(include=["embeddings", "documents", "metadatas"])
+    ids = data["ids"]
+    vectors = np.asarray(data["embeddings"], dtype=np.float32) if ids else None
+    if vectors is not None:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1.0)
+
+    metadata["hnsw:space"] = "ip"
+    target = client.create_collection(ip_name, metadata=metadata)
+    batch_size = max(1, min(batch_size, client.get_max_batch_size()))
+    for i in range(0, len(ids), batch_size):
+        target.add(
+            ids=ids[i:i + batch_size],
+            embeddings=vectors[i:i + batch_size],
+            documents=data["documents"][i:i + batch_size],
+            metadatas=data["metadatas"][i:i + batch_size],
+        )
+    # Keep the original under a backup name until the copy holds its name.
+    source.modify(name=backup_name)
+    target.modify(name=collection_name)
+    client.delete_collection(backup_name)
+    get_query_cache(persist_dir).invalidate(collection_name)
+    print(f"Migrated {len(ids)} items in {collection_name} to normalized vectors with inner-product space.")
+
+
 def _get_env_int(key: str, default: int) -> int:
     val = os.getenv(key)
     try:
@@ -87,6 +222,7 @@ def main() -> None:
     chunk_overlap = _get_env_int("CHUNK_OVERLAP", 100)
     encoding_name = os.getenv("ENCODING_NAME", "cl100k_base")
     collection_name = os.getenv("COLLECTION_NAME")
+    batch_size = _get_env_int("INGEST_BATCH", INGEST_BATCH)
 
     if not collection_name:
         collection_name = Path(pdf_path).stem
@@ -105,6 +241,7 @@ def main() -> None:
         chunk_overlap=chunk_overlap,
         encoding_name=encoding_name,
         collection_name=collection_name,
+        batch_size=batch_size,
     )
 
 
@@ -7,25 +7,86 @@ Run with: streamlit run src/ui/app.py
 import streamlit as st
 from pathlib import Path
 import tempfile
+from typing import TYPE_CHECKING
 
-from src.config import PERSIST_DIR, MODEL_NAME, TOP_K, GROQ_API_KEY
-from src.core.vectorstore import get_db
-from src.core.rag_service import setup_rag_chain
+from src.config import PERSIST_DIR, MODEL_NAME, TOP_K, GROQ_API_KEY, GROQ_MODEL_NAME, INGEST_BATCH
 from src.core.utils import (
     perform_retrieve,
     _display_collection_info,
     display_results,
     list_collections_with_stats,
+    normalize_query,
 )
-from langchain_chroma.vectorstores import Chroma
-from src.ingest.build_chroma import build_chroma_from_pdf
 
+if TYPE_CHECKING:
+    from langchain_chroma.vectorstores import Chroma
 
-def display_collection_info(db: Chroma, collection_name: str, persist_dir: str, model_name: str, document_name: str = None):
+
+@st.cache_resource(show_spinner=False)
+def _cached_db(name: str):
+    """Open a collection once per server process instead of on every rerun.
+
+    get_db starts a background warmup query, so the HNSW index is loading while
+    the user is still typing the first query.
+    """
+    from src.core.vectorstore import get_db
+
+    return get_db(name)
+
+
+@st.cache_resource(show_spinner=False)
+def _cached_chain(name: str, top_k: int, groq_model: str):
+    """Build the RAG retriever/LLM/prompt once per (collection, top_k, model)."""
+    from src.core.rag_service import setup_rag_chain_stream
+
+    return setup_rag_chain_stream(_cached_db(name), top_k, groq_model=groq_model)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_stats(persist_dir: str):
+    return list_collections_with_stats(persist_dir)
+
+
+def display_collection_info(db: "Chroma", collection_name: str, persist_dir: str, model_name: str, document_name: str = None):
     """Display information about the selected collection."""
     _display_collection_info(db, collection_name, persist_dir, model_name, document_name, st.subheader, st.write)
 
 
+@st.fragment
+def _retrieve_fragment(db: "Chroma"):
+    """Query input and results; interacting here reruns only this fragment."""
+    query = st.text_input("Enter your query:")
+    if st.button("Search"):
+        if not normalize_query(query):
+            st.warning("Please enter a query.")
+        else:
+            results = perform_retrieve(db, query, TOP_K)
+            display_results(results, st.subheader, st.write)
+
+
+@st.fragment
+def _rag_fragment(chain, collection_name: str):
+    """RAG question input and streamed answer; reruns only this fragment."""
+    from src.core.rag_service import stream_answer
+
+    retriever, llm, prompt = chain
+    query = st.text_input("Enter your query for RAG:", key=f"rag_query_{collection_name}")
+    if st.button("Generate Answer"):
+        if not normalize_query(query):
+            st.warning("Please enter a query.")
+        else:
+            try:
+                st.markdown("**Answer:**")
+                placeholder = st.empty()
+                answer = ""
+                with st.spinner("Generating answer..."):
+                    for chunk in stream_answer(retriever, llm, prompt, query):
+                        answer += chunk
+                        placeholder.markdown(answer)
+            except Exception as e:
+                st.error(f"Error: {e}")
+
+
 def main():
     st.set_page_config(page_title="Contract Documents Analysis")
     st.title("Contract Documents Analysis")
@@ -40,7 +101,7 @@ def main():
     action = st.sidebar.selectbox("Choose action", ["List Collections", "Upload PDF", "Display", "Retrieve", "RAG"])
 
     # Dynamically fetch collections from Chroma
-    stats = list_collections_with_stats(persist_dir)
+    stats = _cached_stats(persist_dir)
     collection_names = [s.get("name") for s in stats if s.get("name")]
     if not collection_names:
         st.sidebar.info("No collections found in the database.")
@@ -52,12 +113,14 @@ def main():
         selected_sources = (selected.get("sample_sources") if isinstance(selected, dict) else []) or []
     pdf_name = selected_sources[0] if selected_sources else None
 
-    # Load the collection
-    db = get_db(selected_collection_name) if selected_collection_name else None
+    # Load the collection only for actions that query it (pulls in the embedding stack)
+    db = None
+    if selected_collection_name and action in ("Display", "Retrieve", "RAG"):
+        db = _cached_db(selected_collection_name)
 
     if action == "List Collections":
         st.header("All Collections")
-        stats = list_collections_with_stats(persist_dir)
+        stats = _cached_stats(persist_dir)
         if not stats:
             st.info("No collections found.")
         else:
@@ -78,6 +141,8 @@ def main():
                 st.warning("Please select a PDF file to upload.")
             else:
                 with st.spinner("Ingesting PDF into Chroma..."):
+                    from src.ingest.build_chroma import build_chroma_from_pdf
+
                     try:
                         # Save uploaded file to a temporary path
                         with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
@@ -93,7 +158,9 @@ def main():
                             chunk_overlap=100,
                             encoding_name="cl100k_base",
                             collection_name=new_collection,
+                            batch_size=INGEST_BATCH,
                         )
+                        _cached_stats.clear()
                         st.success(f"Ingestion complete: collection '{new_collection}' created.")
                         st.caption("This collection should now appear in the selectors above.")
                     except Exception as e:
@@ -104,13 +171,7 @@ def main():
         if not selected_collection_name:
             st.warning("No collection selected.")
             return
-        query = st.text_input("Enter your query:")
-        if st.button("Search"):
-            if not query:
-                st.warning("Please enter a query.")
-            else:
-                results = perform_retrieve(db, query, TOP_K)
-                display_results(results, st.subheader, st.write)
+        _retrieve_fragment(db)
 
     elif action == "Display":
         st.header("Document Information")
@@ -127,26 +188,15 @@ def main():
             if not selected_collection_name:
                 st.warning("No collection selected.")
                 return
-            # Set up RAG chain (uses config defaults)
-            qa_chain = setup_rag_chain(db, TOP_K)
+            # Retriever, streaming LLM and prompt are cached across reruns (config defaults)
+            chain = _cached_chain(selected_collection_name, TOP_K, GROQ_MODEL_NAME)
 
             # Show which collection is in use for RAG, include source if known
             if pdf_name:
                 st.caption(f"Collection: {selected_collection_name} — Source: {pdf_name}")
             else:
                 st.caption(f"Collection: {selected_collection_name}")
-            query = st.text_input("Enter your query for RAG:")
-            if st.button("Generate Answer"):
-                if not query:
-                    st.warning("Please enter a query.")
-                else:
-                    with st.spinner("Generating answer..."):
-                        try:
-                            result = qa_chain.invoke(query)
-                            st.markdown("**Answer:**")
-                            st.write(result['result'])
-                        except Exception as e:
-                            st.error(f"Error: {e}")
+            _rag_fragment(chain, selected_collection_name)
 
 
 if __name__ == "__main__":